@@ -1,32 +1,25 @@
 from __future__ import annotations
 
-import shlex
-import subprocess as sp
-import tempfile
 from argparse import ArgumentParser
 from argparse import Namespace as ANS
 from argparse import _SubParsersAction
-from dataclasses import replace
-from types import SimpleNamespace
-
-from diopter.compiler import (
-    CompilationOutputType,
-    CompilationResult,
-    ObjectCompilationOutput,
-    OptLevel,
-    SourceFile,
-    parse_compilation_setting_from_string,
-)
+
+from diopter.compiler import CompilationOutputType, CompilationResult
 from pyllinliner.inlinercontroller import (
     CallSite,
-    InlinerController,
     InliningControllerCallBacks,
     PluginSettings,
 )
 
 from ilclang.utils.decision import DecisionSet
-from ilclang.utils.logger import Logger
 from ilclang.utils.run_log import callgraph_log, decision_log, erased_log, result_log
+from ilclang.utils.runner import (
+    gen_output_file,
+    gen_run_impl,
+    is_o0_command,
+    parse_compilation_setting_from_argv,
+    run_o0_fallback,
+)
 from ilclang.utils.verbose import VerboseCallBacks
 
 #############
@@ -38,53 +31,78 @@ class DefaultInliningCallBacks(InliningControllerCallBacks):
     store_decisions: bool
     store_final_callgraph: bool
 
-    call_ids: list[int]
-    call_sites: dict[int, CallSite]
+    call_sites: list[CallSite | None]
     decisions: DecisionSet
-    callgraph: tuple[CallSite, ...]
+    callgraph: list[CallSite]
     was_erased: list[CallSite]
 
+    plugin_settings: PluginSettings
+
     def __init__(self, store_decisions: bool, store_final_callgraph: bool) -> None:
         self.store_decisions = store_decisions
         self.store_final_callgraph = store_final_callgraph
 
-        self.call_ids = []
         if store_decisions:
-            self.call_sites = {}
+            self.call_sites = []
             self.decisions = DecisionSet()
             self.was_erased = []
         if store_final_callgraph:
-            self.callgraph = ()
+            self.callgraph = []
+
+        self.plugin_settings = PluginSettings(
+            report_callgraph_at_end=store_final_callgraph,
+            # enable_debug_logs=True
+        )
+
+        # the store flags never change after construction, so bind the
+        # plain versions of the hooks up front instead of checking them
+        # on every call
+        if not store_decisions:
+            self.advice = self._advice_no_store  # type: ignore
+            self.push = self._push_no_store  # type: ignore
+            self.erase = self._erase_no_store  # type: ignore
+        if not store_final_callgraph:
+            self.end = self._end_no_store  # type: ignore
 
     def advice(self, id: int, default: bool) -> bool:
-        decision = default
-        if self.store_decisions:
-            self.decisions.add_decision(self.call_sites[id], decision)
-        return decision
+        call_site = self.call_sites[id]
+        assert call_site is not None
+        self.call_sites[id] = None
+        self.decisions.add_decision(call_site, default)
+        return default
+
+    def _advice_no_store(self, id: int, default: bool) -> bool:
+        return default
 
     def push(self, id: int, call_site: CallSite) -> None:
-        self.call_ids.append(id)
-        if self.store_decisions:
-            self.call_sites[id] = call_site
+        # ids are handed out densely by the plugin, so index by id
+        if id >= len(self.call_sites):
+            self.call_sites.extend([None] * (id - len(self.call_sites) + 1))
+        self.call_sites[id] = call_site
+
+    def _push_no_store(self, id: int, call_site: CallSite) -> None:
+        pass
 
     def pop(self, defaultOrderID: int) -> int:
-        self.call_ids.remove(defaultOrderID)
         return defaultOrderID
 
     def erase(self, ID: int) -> None:
-        self.call_ids.remove(ID)
-        if self.store_decisions:
-            self.was_erased.append(self.call_sites.pop(ID))
+        call_site = self.call_sites[ID]
+        assert call_site is not None
+        self.call_sites[ID] = None
+        self.was_erased.append(call_site)
+
+    def _erase_no_store(self, ID: int) -> None:
+        pass
 
     def start(self) -> PluginSettings:
-        return PluginSettings(
-            report_callgraph_at_end=self.store_final_callgraph,
-            # enable_debug_logs=True
-        )
+        return self.plugin_settings
 
     def end(self, callgraph: tuple[CallSite, ...]) -> None:
-        if self.store_final_callgraph:
-            self.callgraph = self.callgraph + callgraph
+        self.callgraph.extend(callgraph)
+
+    def _end_no_store(self, callgraph: tuple[CallSite, ...]) -> None:
+        pass
 
 
 #######
@@ -112,54 +130,19 @@ def run_inlining(
     if args.verbose or args.verbose_verbose:
         callbacks = VerboseCallBacks(callbacks, args.verbose_verbose)  # type: ignore
 
-    stdout = tempfile.NamedTemporaryFile()
-    stderr = tempfile.NamedTemporaryFile()
-
-    command = shlex.join([compiler] + cli_args)
-    settings, files, comp_output = parse_compilation_setting_from_string(command)
+    if is_o0_command([compiler] + cli_args):
+        return run_o0_fallback([compiler] + cli_args)  # type: ignore
 
-    if settings.opt_level == OptLevel.O0:
-        Logger.warn("Optimization level is O0, will run with clang defaults.")
-        sp.run(command, shell=True, stdout=stdout, stderr=stderr)
-        new_comp_output = SimpleNamespace()
-        new_comp_output.stdout_stderr_output = (
-            f"{stdout.read().decode('utf-8')}\n{stderr.read().decode('utf-8')}"
-        )
-        return new_comp_output  # type: ignore
-
-    source_files = tuple(file for file in files if isinstance(file, SourceFile))
-    object_files = tuple(
-        file for file in files if isinstance(file, ObjectCompilationOutput)
+    settings, files, comp_output = parse_compilation_setting_from_argv(
+        [compiler] + cli_args
     )
 
-    controller = InlinerController(settings)
-
-    try:
-        if len(source_files) == 0:
-            assert len(object_files) > 0, "No source files or object files provided"
-            result = controller.run_on_program_with_callbacks(
-                object_files, comp_output, callbacks, stdout=stdout, stderr=stderr  # type: ignore
-            )
-        elif len(object_files) == 0:
-            assert len(source_files) > 0, "No source files or object files provided"
-            assert len(source_files) == 1, "Multiple source files provided"
-            source_file = source_files[0]
-            result = controller.run_on_program_with_callbacks(
-                source_file, comp_output, callbacks, stdout=stdout, stderr=stderr  # type: ignore
-            )
-    except Exception as e:
-        stdout.seek(0)
-        stderr.seek(0)
-        Logger.info(stdout.read().decode())
-        Logger.info(stderr.read().decode())
-        raise e
-
-    stdout.seek(0)
-    stderr.seek(0)
-    result = replace(
-        result,
-        stdout_stderr_output=f"{stdout.read().decode('utf-8')}\n{stderr.read().decode('utf-8')}",
-    )
+    stdout = gen_output_file()
+    stderr = gen_output_file()
+
+    # generate a runner
+    run_impl = gen_run_impl(stdout, stderr, files, comp_output, settings)
+    result = run_impl(callbacks)
 
     if decision_file is not None:
         decision_log(decision_file, callbacks.decisions)
@@ -173,4 +156,4 @@ def run_inlining(
     if log_file is not None:
         result_log(log_file, result.stdout_stderr_output)
 
-    return result  # type: ignore
+    return result
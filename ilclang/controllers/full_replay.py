@@ -1,33 +1,26 @@
 from __future__ import annotations
 
-import shlex
-import subprocess as sp
-import tempfile
 from argparse import ArgumentParser
 from argparse import Namespace as ANS
 from argparse import _SubParsersAction
-from dataclasses import replace
-from types import SimpleNamespace
-
-from diopter.compiler import (
-    CompilationOutputType,
-    CompilationResult,
-    ObjectCompilationOutput,
-    OptLevel,
-    SourceFile,
-    parse_compilation_setting_from_string,
-)
+
+from diopter.compiler import CompilationOutputType, CompilationResult
 from pyllinliner.inlinercontroller import (
     CallSite,
-    InlinerController,
     InliningControllerCallBacks,
     PluginSettings,
 )
 
 from ilclang.utils.decision import DecisionSet
 from ilclang.utils.decision_file import load_callsite_file, load_decision_file
-from ilclang.utils.logger import Logger
 from ilclang.utils.run_log import callgraph_log, decision_log, erased_log, result_log
+from ilclang.utils.runner import (
+    gen_output_file,
+    gen_run_impl,
+    is_o0_command,
+    parse_compilation_setting_from_argv,
+    run_o0_fallback,
+)
 from ilclang.utils.verbose import VerboseCallBacks
 
 #############
@@ -41,12 +34,15 @@ class FullReplayInliningCallBacks(InliningControllerCallBacks):
 
     id_map: dict[CallSite, int]
     decisions: DecisionSet
-    callgraph: tuple[CallSite, ...]
+    callgraph: list[CallSite]
 
     replay_decisions: DecisionSet
+    replay_call_sites: set[CallSite]
     replay_idx: int
 
-    erase_ids: list[int]
+    erase_decisions: list[CallSite]
+    erase_call_sites: set[CallSite]
+    erase_ids: set[int]
 
     plugin_settings: PluginSettings
 
@@ -59,9 +55,14 @@ class FullReplayInliningCallBacks(InliningControllerCallBacks):
         plugin_settings: PluginSettings,
     ) -> None:
         self.replay_decisions = replay_decisions
+        # push only needs to know whether a call site is replayed, so index
+        # them once instead of scanning the decisions on every push
+        self.replay_call_sites = {d.call_site for d in replay_decisions.decisions}
         self.replay_idx = 0
 
         self.erase_decisions = erase_decisions
+        # push probes for membership on every call site it doesn't replay
+        self.erase_call_sites = set(erase_decisions)
 
         self.store_decisions = store_decisions
         self.store_final_callgraph = store_final_callgraph
@@ -70,9 +71,9 @@ class FullReplayInliningCallBacks(InliningControllerCallBacks):
         if store_decisions:
             self.decisions = DecisionSet()
         if store_final_callgraph:
-            self.callgraph = ()
+            self.callgraph = []
 
-        self.erase_ids = []
+        self.erase_ids = set()
 
         self.plugin_settings = plugin_settings
 
@@ -84,15 +85,14 @@ class FullReplayInliningCallBacks(InliningControllerCallBacks):
 
     def push(self, id: int, call_site: CallSite) -> None:
         # check that call site is in replay decisions
-        cs_decision = self.replay_decisions.decision_for(call_site)
-        if cs_decision is None:
+        if call_site not in self.replay_call_sites:
             # check if call site is not in erase decisions
-            if call_site not in self.erase_decisions:
+            if call_site not in self.erase_call_sites:
                 assert (
                     False
                 ), f"Call site {call_site} not in replay decisions or erase decisions"
             else:
-                self.erase_ids.append(id)
+                self.erase_ids.add(id)
             return
 
         # add call site to id map
@@ -118,7 +118,7 @@ class FullReplayInliningCallBacks(InliningControllerCallBacks):
 
     def end(self, callgraph: tuple[CallSite, ...]) -> None:
         if self.store_final_callgraph:
-            self.callgraph = self.callgraph + callgraph
+            self.callgraph.extend(callgraph)
 
 
 #######
@@ -178,54 +178,19 @@ def run_inlining(
     if args.verbose or args.verbose_verbose:
         callbacks = VerboseCallBacks(callbacks, args.verbose_verbose)  # type: ignore
 
-    stdout = tempfile.NamedTemporaryFile()
-    stderr = tempfile.NamedTemporaryFile()
-
-    command = shlex.join([compiler] + cli_args)
-    settings, files, comp_output = parse_compilation_setting_from_string(command)
+    if is_o0_command([compiler] + cli_args):
+        return run_o0_fallback([compiler] + cli_args)  # type: ignore
 
-    if settings.opt_level == OptLevel.O0:
-        Logger.warn("Optimization level is O0, will run with clang defaults.")
-        sp.run(command, shell=True, stdout=stdout, stderr=stderr)
-        new_comp_output = SimpleNamespace()
-        new_comp_output.stdout_stderr_output = (
-            f"{stdout.read().decode('utf-8')}\n{stderr.read().decode('utf-8')}"
-        )
-        return new_comp_output  # type: ignore
-
-    source_files = tuple(file for file in files if isinstance(file, SourceFile))
-    object_files = tuple(
-        file for file in files if isinstance(file, ObjectCompilationOutput)
+    settings, files, comp_output = parse_compilation_setting_from_argv(
+        [compiler] + cli_args
     )
 
-    controller = InlinerController(settings)
-
-    try:
-        if len(source_files) == 0:
-            assert len(object_files) > 0, "No source files or object files provided"
-            result = controller.run_on_program_with_callbacks(
-                object_files, comp_output, callbacks, stdout=stdout, stderr=stderr  # type: ignore
-            )
-        elif len(object_files) == 0:
-            assert len(source_files) > 0, "No source files or object files provided"
-            assert len(source_files) == 1, "Multiple source files provided"
-            source_file = source_files[0]
-            result = controller.run_on_program_with_callbacks(
-                source_file, comp_output, callbacks, stdout=stdout, stderr=stderr  # type: ignore
-            )
-    except Exception as e:
-        stdout.seek(0)
-        stderr.seek(0)
-        Logger.info(stdout.read().decode())
-        Logger.info(stderr.read().decode())
-        raise e
-
-    stdout.seek(0)
-    stderr.seek(0)
-    result = replace(
-        result,
-        stdout_stderr_output=f"{stdout.read().decode('utf-8')}\n{stderr.read().decode('utf-8')}",
-    )
+    stdout = gen_output_file()
+    stderr = gen_output_file()
+
+    # generate a runner
+    run_impl = gen_run_impl(stdout, stderr, files, comp_output, settings)
+    result = run_impl(callbacks)
 
     if decision_file is not None:
         decision_log(decision_file, callbacks.decisions)
@@ -239,4 +204,4 @@ def run_inlining(
     if log_file is not None:
         result_log(log_file, result.stdout_stderr_output)
 
-    return result  # type: ignore
+    return result
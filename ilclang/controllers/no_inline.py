@@ -1,32 +1,20 @@
 from __future__ import annotations
 
-import shlex
-import subprocess as sp
-import tempfile
 from argparse import ArgumentParser
 from argparse import Namespace as ANS
 from argparse import _SubParsersAction
-from dataclasses import replace
-from types import SimpleNamespace
-
-from diopter.compiler import (
-    CompilationOutputType,
-    CompilationResult,
-    ObjectCompilationOutput,
-    OptLevel,
-    SourceFile,
-    parse_compilation_setting_from_string,
-)
-from pyllinliner.inlinercontroller import (
-    CallSite,
-    InlinerController,
-    InliningControllerCallBacks,
-    PluginSettings,
-)
 
-from ilclang.utils.decision import DecisionSet
-from ilclang.utils.logger import Logger
+from diopter.compiler import CompilationOutputType, CompilationResult
+
+from ilclang.controllers.default import DefaultInliningCallBacks
 from ilclang.utils.run_log import callgraph_log, decision_log, erased_log, result_log
+from ilclang.utils.runner import (
+    gen_output_file,
+    gen_run_impl,
+    is_o0_command,
+    parse_compilation_setting_from_argv,
+    run_o0_fallback,
+)
 from ilclang.utils.verbose import VerboseCallBacks
 
 #############
@@ -34,57 +22,12 @@ from ilclang.utils.verbose import VerboseCallBacks
 #############
 
 
-class NoInliningCallBacks(InliningControllerCallBacks):
-    store_decisions: bool
-    store_final_callgraph: bool
-
-    call_ids: list[int]
-    call_sites: dict[int, CallSite]
-    decisions: DecisionSet
-    callgraph: tuple[CallSite, ...]
-    was_erased: list[CallSite]
-
-    def __init__(self, store_decisions: bool, store_final_callgraph: bool) -> None:
-        self.store_decisions = store_decisions
-        self.store_final_callgraph = store_final_callgraph
-
-        self.call_ids = []
-        if store_decisions:
-            self.call_sites = {}
-            self.decisions = DecisionSet()
-            self.was_erased = []
-        if store_final_callgraph:
-            self.callgraph = ()
-
+class NoInliningCallBacks(DefaultInliningCallBacks):
     def advice(self, id: int, default: bool) -> bool:
-        if self.store_decisions:
-            call_site = self.call_sites.pop(id)
-            self.decisions.add_decision(call_site, False)
-        return False
+        return super().advice(id, False)
 
-    def push(self, id: int, call_site: CallSite) -> None:
-        self.call_ids.append(id)
-        if self.store_decisions:
-            self.call_sites[id] = call_site
-
-    def pop(self, defaultOrderID: int) -> int:
-        self.call_ids.remove(defaultOrderID)
-        return defaultOrderID
-
-    def erase(self, ID: int) -> None:
-        self.call_ids.remove(ID)
-        if self.store_decisions:
-            self.was_erased.append(self.call_sites.pop(ID))
-
-    def start(self) -> PluginSettings:
-        return PluginSettings(
-            report_callgraph_at_end=self.store_final_callgraph,
-            # enable_debug_logs=True
-        )
-
-    def end(self, callgraph: tuple[CallSite, ...]) -> None:
-        if self.store_final_callgraph:
-            self.callgraph = self.callgraph + callgraph
+    def _advice_no_store(self, id: int, default: bool) -> bool:
+        return False
 
 
 #######
@@ -112,54 +55,19 @@ def run_inlining(
     if args.verbose or args.verbose_verbose:
         callbacks = VerboseCallBacks(callbacks, args.verbose_verbose)  # type: ignore
 
-    stdout = tempfile.NamedTemporaryFile()
-    stderr = tempfile.NamedTemporaryFile()
+    if is_o0_command([compiler] + cli_args):
+        return run_o0_fallback([compiler] + cli_args)  # type: ignore
 
-    command = shlex.join([compiler] + cli_args)
-    settings, files, comp_output = parse_compilation_setting_from_string(command)
-
-    if settings.opt_level == OptLevel.O0:
-        Logger.warn("Optimization level is O0, will run with clang defaults.")
-        sp.run(command, shell=True, stdout=stdout, stderr=stderr)
-        new_comp_output = SimpleNamespace()
-        new_comp_output.stdout_stderr_output = (
-            f"{stdout.read().decode('utf-8')}\n{stderr.read().decode('utf-8')}"
-        )
-        return new_comp_output  # type: ignore
-
-    source_files = tuple(file for file in files if isinstance(file, SourceFile))
-    object_files = tuple(
-        file for file in files if isinstance(file, ObjectCompilationOutput)
+    settings, files, comp_output = parse_compilation_setting_from_argv(
+        [compiler] + cli_args
     )
 
-    controller = InlinerController(settings)
-
-    try:
-        if len(source_files) == 0:
-            assert len(object_files) > 0, "No source files or object files provided"
-            result = controller.run_on_program_with_callbacks(
-                object_files, comp_output, callbacks, stdout=stdout, stderr=stderr  # type: ignore
-            )
-        elif len(object_files) == 0:
-            assert len(source_files) > 0, "No source files or object files provided"
-            assert len(source_files) == 1, "Multiple source files provided"
-            source_file = source_files[0]
-            result = controller.run_on_program_with_callbacks(
-                source_file, comp_output, callbacks, stdout=stdout, stderr=stderr  # type: ignore
-            )
-    except Exception as e:
-        stdout.seek(0)
-        stderr.seek(0)
-        Logger.info(stdout.read().decode())
-        Logger.info(stderr.read().decode())
-        raise e
-
-    stdout.seek(0)
-    stderr.seek(0)
-    result = replace(
-        result,
-        stdout_stderr_output=f"{stdout.read().decode('utf-8')}\n{stderr.read().decode('utf-8')}",
-    )
+    stdout = gen_output_file()
+    stderr = gen_output_file()
+
+    # generate a runner
+    run_impl = gen_run_impl(stdout, stderr, files, comp_output, settings)
+    result = run_impl(callbacks)
 
     if decision_file is not None:
         decision_log(decision_file, callbacks.decisions)
@@ -173,4 +81,4 @@ def run_inlining(
     if log_file is not None:
         result_log(log_file, result.stdout_stderr_output)
 
-    return result  # type: ignore
+    return result
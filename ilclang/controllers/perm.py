@@ -1,34 +1,132 @@
 from __future__ import annotations
 
 import os
-import shlex
-import tempfile
+import sys
 from argparse import ArgumentParser
 from argparse import Namespace as ANS
 from argparse import _SubParsersAction
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import replace
+from functools import partial
+from multiprocessing import get_all_start_methods, get_context
+from typing import Callable
 
 from diopter.compiler import (
+    CompilationOutput,
     CompilationOutputType,
     CompilationResult,
+    CompilationSetting,
     ObjectCompilationOutput,
     OptLevel,
     SourceFile,
-    parse_compilation_setting_from_string,
 )
 from pyllinliner.inlinercontroller import (
-    InlinerController,
+    CallSite,
     InliningControllerCallBacks,
     PluginSettings,
 )
 
 from ilclang.controllers.default import DefaultInliningCallBacks
 from ilclang.controllers.full_replay import FullReplayInliningCallBacks
+from ilclang.utils.decision import DecisionSet
 from ilclang.utils.decision_file import trickle_decision_flip
 from ilclang.utils.logger import Logger
 from ilclang.utils.run_log import decision_log
+from ilclang.utils.runner import (
+    gen_output_file,
+    gen_run_impl,
+    parse_compilation_setting_from_argv,
+)
 from ilclang.utils.verbose import VerboseCallBacks
 
+###########
+# WORKERS #
+###########
+
+# runner of the current worker process, set up once by init_worker
+worker_run_impl: Callable[
+    [InliningControllerCallBacks], CompilationResult[CompilationOutputType]
+] | None = None
+
+
+def init_worker(
+    settings: CompilationSetting,
+    files: list[SourceFile | ObjectCompilationOutput],
+    comp_output: CompilationOutput,
+) -> None:
+    global worker_run_impl
+    # each worker needs its own output files, sharing the parent's would mix
+    # the output of concurrent compiles, but the runner is reused for every
+    # replay the worker handles
+    stdout = gen_output_file()
+    stderr = gen_output_file()
+    worker_run_impl = gen_run_impl(stdout, stderr, files, comp_output, settings)
+
+
+def run_flip(
+    flip_idx: int,
+    run_impl: Callable[
+        [InliningControllerCallBacks], CompilationResult[CompilationOutputType]
+    ],
+    default_decisions: DecisionSet,
+    default_erase: list[CallSite],
+    verbose: bool,
+    verbose_verbose: bool,
+) -> CompilationResult[CompilationOutputType] | None:
+    # working out the flipped decision sets is as independent as replaying
+    # them, so one flip index is handled end to end
+    new_decisions_arr = trickle_decision_flip(
+        default_decisions, default_decisions.decisions[flip_idx].call_site
+    )
+
+    replay_result = None
+    for version, new_decisions in enumerate(new_decisions_arr):
+        Logger.info("--------------------------")
+        Logger.info(f"Flip {flip_idx} Version {version}")
+        for decision in new_decisions.decisions:
+            Logger.info(decision)
+        Logger.info("--------------------------")
+        # store instructions
+        new_decision_file = f"out/instructions_{flip_idx}_v_{version}.log"
+        decision_log(new_decision_file, new_decisions)
+        # run the replay inlining
+        replay_callbacks = FullReplayInliningCallBacks(
+            False, False, new_decisions, default_erase, PluginSettings()
+        )
+        if verbose or verbose_verbose:
+            replay_callbacks = VerboseCallBacks(
+                replay_callbacks, verbose_verbose
+            )  # type: ignore
+        replay_result = run_impl(replay_callbacks)
+        Logger.debug(replay_result.stdout_stderr_output)
+    # only the last replay is reported back, the rest are already logged
+    return replay_result
+
+
+def run_flip_in_worker(
+    flip_idx: int,
+    default_decisions: DecisionSet,
+    default_erase: list[CallSite],
+    verbose: bool,
+    verbose_verbose: bool,
+) -> CompilationResult[CompilationOutputType] | None:
+    assert worker_run_impl is not None, "Worker was not initialized"
+    try:
+        return run_flip(
+            flip_idx,
+            worker_run_impl,
+            default_decisions,
+            default_erase,
+            verbose,
+            verbose_verbose,
+        )
+    finally:
+        # forked workers buffer stdout on their own, flush it so the log of
+        # this flip, including the header of a failing replay, isn't held
+        # back behind later flips
+        sys.stdout.flush()
+
+
 #######
 # API #
 #######
@@ -39,6 +137,13 @@ def setup_parser(subparser: _SubParsersAction[ArgumentParser]) -> ArgumentParser
     parser_perm.add_argument(
         "flips", help="How many decisions to filp per permutation", type=int
     )
+    parser_perm.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="number of replay compilations to run in parallel",
+        default=1,
+    )
     return parser_perm
 
 
@@ -51,60 +156,18 @@ def run_inlining(
     # final_callgraph_file = args.final_callgraph
     cli_args = args.cli
 
-    stdout = tempfile.NamedTemporaryFile()
-    stderr = tempfile.NamedTemporaryFile()
+    stdout = gen_output_file()
+    stderr = gen_output_file()
 
-    command = shlex.join([compiler] + cli_args)
-    settings, files, comp_output = parse_compilation_setting_from_string(command)
+    settings, files, comp_output = parse_compilation_setting_from_argv(
+        [compiler] + cli_args
+    )
 
     if settings.opt_level == OptLevel.O0:
         Logger.fatal("This mode cannot be run with optimization level 0")
 
-    source_files = tuple(file for file in files if isinstance(file, SourceFile))
-    object_files = tuple(
-        file for file in files if isinstance(file, ObjectCompilationOutput)
-    )
-
-    controller = InlinerController(settings)
-
-    def run_impl(
-        callbacks: InliningControllerCallBacks,
-    ) -> CompilationResult[CompilationOutputType]:
-        # first we clear the stdout and stderr files
-        stdout.seek(0)
-        stderr.seek(0)
-        stdout.truncate(0)
-        stderr.truncate(0)
-
-        try:
-            # then we run the program
-            if len(source_files) == 0:
-                assert len(object_files) > 0, "No source files or object files provided"
-                result = controller.run_on_program_with_callbacks(
-                    object_files, comp_output, callbacks, stdout=stdout, stderr=stderr  # type: ignore
-                )
-            elif len(object_files) == 0:
-                assert len(source_files) > 0, "No source files or object files provided"
-                assert len(source_files) == 1, "Multiple source files provided"
-                source_file = source_files[0]
-                result = controller.run_on_program_with_callbacks(
-                    source_file, comp_output, callbacks, stdout=stdout, stderr=stderr  # type: ignore
-                )
-        except Exception as e:
-            stdout.seek(0)
-            stderr.seek(0)
-            Logger.info(stdout.read().decode())
-            Logger.info(stderr.read().decode())
-            raise e
-
-        stdout.seek(0)
-        stderr.seek(0)
-        result = replace(
-            result,
-            stdout_stderr_output=f"{stdout.read().decode('utf-8')}\n{stderr.read().decode('utf-8')}",
-        )
-
-        return result  # type: ignore
+    # generate a runner
+    run_impl = gen_run_impl(stdout, stderr, files, comp_output, settings)
 
     # check if out directory exists
     if not os.path.exists("out"):
@@ -131,33 +194,48 @@ def run_inlining(
 
     # TODO generatlize for mor than one flip
     # run each permutation
-    next_to_flip = 0
-    while len(default_decisions.decisions) > next_to_flip:
-        new_decisions_arr = trickle_decision_flip(
-            default_decisions, default_decisions.decisions[next_to_flip].call_site
-        )
-
-        for version in range(0, len(new_decisions_arr)):
-            new_decisions = new_decisions_arr[version]
-
-            Logger.info("--------------------------")
-            Logger.info(f"Flip {next_to_flip} Version {version}")
-            for decision in new_decisions.decisions:
-                Logger.info(decision)
-            Logger.info("--------------------------")
-            # store instructions
-            new_decision_file = f"out/instructions_{next_to_flip}_v_{version}.log"
-            decision_log(new_decision_file, new_decisions)
-            # run the replay inlining
-            replay_callbacks = FullReplayInliningCallBacks(
-                False, False, new_decisions, default_erase, PluginSettings()
+    jobs = args.jobs
+    if jobs > 1 and "fork" not in get_all_start_methods():
+        # workers rely on fork to inherit the parent's setup, e.g. debug logging
+        Logger.warn("Parallel replay needs fork, running the flips serially")
+        jobs = 1
+    if jobs <= 1:
+        # serially, reusing the baseline's runner
+        for next_to_flip in range(len(default_decisions.decisions)):
+            flip_result = run_flip(
+                next_to_flip,
+                run_impl,
+                default_decisions,
+                default_erase,
+                args.verbose,
+                args.verbose_verbose,
+            )
+            if flip_result is not None:
+                replay_result = flip_result
+    else:
+        # every flip index is independent so they are farmed out to worker
+        # processes, which log as they go
+        # flush first, forked workers would otherwise inherit and print again
+        # whatever is still sitting in our stdout buffer
+        sys.stdout.flush()
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            mp_context=get_context("fork"),
+            initializer=init_worker,
+            initargs=(settings, files, comp_output),
+        ) as executor:
+            flips = executor.map(
+                partial(
+                    run_flip_in_worker,
+                    default_decisions=default_decisions,
+                    default_erase=default_erase,
+                    verbose=args.verbose,
+                    verbose_verbose=args.verbose_verbose,
+                ),
+                range(len(default_decisions.decisions)),
             )
-            if args.verbose or args.verbose_verbose:
-                replay_callbacks = VerboseCallBacks(
-                    replay_callbacks, args.verbose_verbose
-                )  # type: ignore
-            replay_result = run_impl(replay_callbacks)
-            Logger.debug(replay_result.stdout_stderr_output)
-        next_to_flip += 1
+            for flip_result in flips:
+                if flip_result is not None:
+                    replay_result = flip_result
 
     return replace(replay_result, stdout_stderr_output="")
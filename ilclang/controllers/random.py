@@ -1,33 +1,21 @@
 from __future__ import annotations
 
 import random
-import shlex
-import subprocess as sp
-import tempfile
 from argparse import ArgumentParser
 from argparse import Namespace as ANS
 from argparse import _SubParsersAction
-from dataclasses import replace
-from types import SimpleNamespace
-
-from diopter.compiler import (
-    CompilationOutputType,
-    CompilationResult,
-    ObjectCompilationOutput,
-    OptLevel,
-    SourceFile,
-    parse_compilation_setting_from_string,
-)
-from pyllinliner.inlinercontroller import (
-    CallSite,
-    InlinerController,
-    InliningControllerCallBacks,
-    PluginSettings,
-)
 
-from ilclang.utils.decision import DecisionSet
-from ilclang.utils.logger import Logger
+from diopter.compiler import CompilationOutputType, CompilationResult
+
+from ilclang.controllers.default import DefaultInliningCallBacks
 from ilclang.utils.run_log import callgraph_log, decision_log, erased_log, result_log
+from ilclang.utils.runner import (
+    gen_output_file,
+    gen_run_impl,
+    is_o0_command,
+    parse_compilation_setting_from_argv,
+    run_o0_fallback,
+)
 from ilclang.utils.verbose import VerboseCallBacks
 
 #############
@@ -35,17 +23,9 @@ from ilclang.utils.verbose import VerboseCallBacks
 #############
 
 
-class RandomInliningCallBacks(InliningControllerCallBacks):
-    store_decisions: bool
-    store_final_callgraph: bool
-
-    call_ids: list[int]
-    call_sites: dict[int, CallSite]
-    decisions: DecisionSet
-    callgraph: tuple[CallSite, ...]
+class RandomInliningCallBacks(DefaultInliningCallBacks):
     flip_probability: float
     rng: random.Random
-    was_erased: list[CallSite]
 
     def __init__(
         self,
@@ -57,51 +37,31 @@ class RandomInliningCallBacks(InliningControllerCallBacks):
         self.flip_probability = flip_probability
         self.rng = random.Random(seed)
 
-        self.store_decisions = store_decisions
-        self.store_final_callgraph = store_final_callgraph
+        super().__init__(store_decisions, store_final_callgraph)
 
-        self.call_ids = []
-        if store_decisions:
-            self.call_sites = {}
-            self.decisions = DecisionSet()
-            self.was_erased = []
-        if store_final_callgraph:
-            self.callgraph = ()
+    def should_flip(self) -> bool:
+        # the draw can't change the outcome at either end of the range, so
+        # skip it there, otherwise keep the float draw so seeded runs stay
+        # reproducible
+        if self.flip_probability <= 0:
+            return False
+        if self.flip_probability >= 1:
+            return True
+        return self.rng.random() < self.flip_probability
 
     def advice(self, id: int, default: bool) -> bool:
-        if self.rng.random() < self.flip_probability:
-            decison = not default
-        else:
-            decison = default
-
-        if self.store_decisions:
-            call_site = self.call_sites.pop(id)
-            self.decisions.add_decision(call_site, decison, default != decison)
-
+        # xor with the draw rather than branching on it, and reuse the draw
+        # as the flipped flag instead of comparing against the default
+        flipped = self.should_flip()
+        decison = default ^ flipped
+        call_site = self.call_sites[id]
+        assert call_site is not None
+        self.call_sites[id] = None
+        self.decisions.add_decision(call_site, decison, flipped)
         return decison
 
-    def push(self, id: int, call_site: CallSite) -> None:
-        self.call_ids.append(id)
-        if self.store_decisions:
-            self.call_sites[id] = call_site
-
-    def pop(self, defaultOrderID: int) -> int:
-        self.call_ids.remove(defaultOrderID)
-        return defaultOrderID
-
-    def erase(self, ID: int) -> None:
-        self.call_ids.remove(ID)
-        if self.store_decisions:
-            self.was_erased.append(self.call_sites.pop(ID))
-
-    def start(self) -> PluginSettings:
-        return PluginSettings(
-            report_callgraph_at_end=self.store_final_callgraph,
-        )
-
-    def end(self, callgraph: tuple[CallSite, ...]) -> None:
-        if self.store_final_callgraph:
-            self.callgraph = self.callgraph + callgraph
+    def _advice_no_store(self, id: int, default: bool) -> bool:
+        return default ^ self.should_flip()
 
 
 #######
@@ -142,54 +102,19 @@ def run_inlining(
     if args.verbose or args.verbose_verbose:
         callbacks = VerboseCallBacks(callbacks, args.verbose_verbose)  # type: ignore
 
-    stdout = tempfile.NamedTemporaryFile()
-    stderr = tempfile.NamedTemporaryFile()
-
-    command = shlex.join([compiler] + cli_args)
-    settings, files, comp_output = parse_compilation_setting_from_string(command)
+    if is_o0_command([compiler] + cli_args):
+        return run_o0_fallback([compiler] + cli_args)  # type: ignore
 
-    if settings.opt_level == OptLevel.O0:
-        Logger.warn("Optimization level is O0, will run with clang defaults.")
-        sp.run(command, shell=True, stdout=sp.PIPE, stderr=sp.STDOUT)
-        new_comp_output = SimpleNamespace()
-        new_comp_output.stdout_stderr_output = (
-            f"{stdout.read().decode('utf-8')}\n{stderr.read().decode('utf-8')}"
-        )
-        return new_comp_output  # type: ignore
-
-    source_files = tuple(file for file in files if isinstance(file, SourceFile))
-    object_files = tuple(
-        file for file in files if isinstance(file, ObjectCompilationOutput)
+    settings, files, comp_output = parse_compilation_setting_from_argv(
+        [compiler] + cli_args
     )
 
-    controller = InlinerController(settings)
-
-    try:
-        if len(source_files) == 0:
-            assert len(object_files) > 0, "No source files or object files provided"
-            result = controller.run_on_program_with_callbacks(
-                object_files, comp_output, callbacks
-            )
-        elif len(object_files) == 0:
-            assert len(source_files) > 0, "No source files or object files provided"
-            assert len(source_files) == 1, "Multiple source files provided"
-            source_file = source_files[0]
-            result = controller.run_on_program_with_callbacks(
-                source_file, comp_output, callbacks
-            )
-    except Exception as e:
-        stdout.seek(0)
-        stderr.seek(0)
-        Logger.info(stdout.read().decode())
-        Logger.info(stderr.read().decode())
-        raise e
-
-    stdout.seek(0)
-    stderr.seek(0)
-    result = replace(
-        result,
-        stdout_stderr_output=f"{stdout.read().decode('utf-8')}\n{stderr.read().decode('utf-8')}",
-    )
+    stdout = gen_output_file()
+    stderr = gen_output_file()
+
+    # generate a runner
+    run_impl = gen_run_impl(stdout, stderr, files, comp_output, settings)
+    result = run_impl(callbacks)
 
     if decision_file is not None:
         decision_log(decision_file, callbacks.decisions)
@@ -203,4 +128,4 @@ def run_inlining(
     if log_file is not None:
         result_log(log_file, result.stdout_stderr_output)
 
-    return result  # type: ignore
+    return result
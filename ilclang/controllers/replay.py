@@ -1,13 +1,9 @@
 from __future__ import annotations
 
-import shlex
-import subprocess as sp
-import tempfile
 from argparse import ArgumentParser
 from argparse import Namespace as ANS
 from argparse import _SubParsersAction
 from dataclasses import replace
-from types import SimpleNamespace
 from typing import IO
 
 from diopter.compiler import (
@@ -15,14 +11,12 @@ from diopter.compiler import (
     CompilationOutputType,
     CompilationResult,
     ObjectCompilationOutput,
-    OptLevel,
     SourceFile,
-    parse_compilation_setting_from_string,
 )
 from pyllinliner.inlinercontroller import (
     InlinerController,
-    PluginSettings,
     InlinerState,
+    PluginSettings,
     proto,
 )
 
@@ -30,7 +24,13 @@ from ilclang.utils.decision import DecisionSet
 from ilclang.utils.decision_file import load_decision_file
 from ilclang.utils.logger import Logger
 from ilclang.utils.run_log import callgraph_log, decision_log, erased_log, result_log
-from ilclang.utils.runner import gen_run_impl_base
+from ilclang.utils.runner import (
+    gen_output_file,
+    gen_run_impl_base,
+    is_o0_command,
+    parse_compilation_setting_from_argv,
+    run_o0_fallback,
+)
 
 #######
 # API #
@@ -53,23 +53,18 @@ def run_inlining(
     cli_args = args.cli
     replay_file = args.replay_file
 
-    # IO
-    stdout = tempfile.NamedTemporaryFile()
-    stderr = tempfile.NamedTemporaryFile()
+    if is_o0_command([compiler] + cli_args):
+        return run_o0_fallback([compiler] + cli_args)  # type: ignore
 
-    replay_decisions = load_decision_file(replay_file).to_pyll_tuple()
+    settings, files, comp_output = parse_compilation_setting_from_argv(
+        [compiler] + cli_args
+    )
 
-    command = shlex.join([compiler] + cli_args)
-    settings, files, comp_output = parse_compilation_setting_from_string(command)
+    replay_decisions = load_decision_file(replay_file).to_pyll_tuple()
 
-    if settings.opt_level == OptLevel.O0:
-        Logger.warn("Optimization level is O0, will run with clang defaults.")
-        sp.run(command, shell=True, stdout=stdout, stderr=stderr)
-        new_comp_output = SimpleNamespace()
-        new_comp_output.stdout_stderr_output = (
-            f"{stdout.read().decode('utf-8')}\n{stderr.read().decode('utf-8')}"
-        )
-        return new_comp_output  # type: ignore
+    # IO
+    stdout = gen_output_file()
+    stderr = gen_output_file()
 
     # generate a runner
     plugin_settings = PluginSettings(
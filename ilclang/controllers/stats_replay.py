@@ -1,34 +1,27 @@
 from __future__ import annotations
 
 import random
-import shlex
-import subprocess as sp
-import tempfile
 from argparse import ArgumentParser
 from argparse import Namespace as ANS
 from argparse import _SubParsersAction
-from dataclasses import replace
-from types import SimpleNamespace
-
-from diopter.compiler import (
-    CompilationOutputType,
-    CompilationResult,
-    ObjectCompilationOutput,
-    OptLevel,
-    SourceFile,
-    parse_compilation_setting_from_string,
-)
+
+from diopter.compiler import CompilationOutputType, CompilationResult
 from pyllinliner.inlinercontroller import (
     CallSite,
-    InlinerController,
     InliningControllerCallBacks,
     PluginSettings,
 )
 
-from ilclang.utils.decision import DecisionSet
+from ilclang.utils.decision import Decision, DecisionSet
 from ilclang.utils.decision_file import load_callsite_file, load_decision_file
-from ilclang.utils.logger import Logger
 from ilclang.utils.run_log import callgraph_log, decision_log, erased_log, result_log
+from ilclang.utils.runner import (
+    gen_output_file,
+    gen_run_impl,
+    is_o0_command,
+    parse_compilation_setting_from_argv,
+    run_o0_fallback,
+)
 from ilclang.utils.verbose import VerboseCallBacks
 
 #############
@@ -45,6 +38,7 @@ class StatsReplayInliningCallBacks(InliningControllerCallBacks):
     stats: dict[str, object]
 
     replay_decisions: DecisionSet
+    replay_by_call_site: dict[CallSite, Decision]
     replay_idx: int
     plugin_settings: PluginSettings
     flip_rate: float | None
@@ -52,7 +46,7 @@ class StatsReplayInliningCallBacks(InliningControllerCallBacks):
     call_sites: dict[int, CallSite]
     call_ids: dict[CallSite, int]
     decisions: DecisionSet
-    callgraph: tuple[CallSite, ...]
+    callgraph: list[CallSite]
     was_erased: list[CallSite]
 
     def __init__(
@@ -87,6 +81,11 @@ class StatsReplayInliningCallBacks(InliningControllerCallBacks):
         self.stats["unsuccesful_inlining"] = 0
 
         self.replay_decisions = replay_decisions
+        # index the replay decisions so advice doesn't rescan them, keeping
+        # the first decision for a call site as decision_for would
+        self.replay_by_call_site = {}
+        for d in replay_decisions.decisions:
+            self.replay_by_call_site.setdefault(d.call_site, d)
         self.replay_idx = 0
         self.plugin_settings = plugin_settings
         self.flip_rate = flip_rate
@@ -97,15 +96,17 @@ class StatsReplayInliningCallBacks(InliningControllerCallBacks):
         self.was_erased = []
 
         if store_final_callgraph:
-            self.callgraph = ()
+            self.callgraph = []
 
-    def advice(self, id: int, default: bool) -> bool:
+        # nothing reads the decisions back unless they are logged, so skip
+        # recording them in that case
+        if not store_decisions:
+            self.advice = self._advice_no_store  # type: ignore
+
+    def decide(self, call_site: CallSite, default: bool) -> bool:
         self.stats["advice"] += 1
-        # get call site for id
-        call_site = self.call_sites.pop(id)
-        self.call_ids.pop(call_site)
         # check if call site is in replay decisions
-        if decision := self.replay_decisions.decision_for(call_site):
+        if decision := self.replay_by_call_site.get(call_site):
             self.replay_idx += 1
             if decision.inlined != default:
                 self.stats["flipped_advice"] += 1
@@ -131,9 +132,21 @@ class StatsReplayInliningCallBacks(InliningControllerCallBacks):
             self.stats["advice_true"] += 1
         else:
             self.stats["advice_false"] += 1
+        return dec
+
+    def advice(self, id: int, default: bool) -> bool:
+        # get call site for id
+        call_site = self.call_sites.pop(id)
+        self.call_ids.pop(call_site)
+        dec = self.decide(call_site, default)
         self.decisions.add_decision(call_site, dec)
         return dec
 
+    def _advice_no_store(self, id: int, default: bool) -> bool:
+        call_site = self.call_sites.pop(id)
+        self.call_ids.pop(call_site)
+        return self.decide(call_site, default)
+
     def push(self, id: int, call_site: CallSite) -> None:
         self.stats["pushes"] += 1
         self.call_sites[id] = call_site
@@ -163,7 +176,7 @@ class StatsReplayInliningCallBacks(InliningControllerCallBacks):
 
     def end(self, callgraph: tuple[CallSite, ...]) -> None:
         if self.store_final_callgraph:
-            self.callgraph = self.callgraph + callgraph
+            self.callgraph.extend(callgraph)
 
     def inlined(self, ID: int) -> None:
         self.stats["inlined"] += 1
@@ -235,54 +248,19 @@ def run_inlining(
     if args.verbose or args.verbose_verbose:
         callbacks = VerboseCallBacks(callbacks, args.verbose_verbose)  # type: ignore
 
-    stdout = tempfile.NamedTemporaryFile()
-    stderr = tempfile.NamedTemporaryFile()
-
-    command = shlex.join([compiler] + cli_args)
-    settings, files, comp_output = parse_compilation_setting_from_string(command)
-
-    if settings.opt_level == OptLevel.O0:
-        Logger.warn("Optimization level is O0, will run with clang defaults.")
-        sp.run(command, shell=True, stdout=stdout, stderr=stderr)
-        new_comp_output = SimpleNamespace()
-        new_comp_output.stdout_stderr_output = (
-            f"{stdout.read().decode('utf-8')}\n{stderr.read().decode('utf-8')}"
-        )
-        return new_comp_output  # type: ignore
+    if is_o0_command([compiler] + cli_args):
+        return run_o0_fallback([compiler] + cli_args)  # type: ignore
 
-    source_files = tuple(file for file in files if isinstance(file, SourceFile))
-    object_files = tuple(
-        file for file in files if isinstance(file, ObjectCompilationOutput)
+    settings, files, comp_output = parse_compilation_setting_from_argv(
+        [compiler] + cli_args
     )
 
-    controller = InlinerController(settings)
-
-    try:
-        if len(source_files) == 0:
-            assert len(object_files) > 0, "No source files or object files provided"
-            result = controller.run_on_program_with_callbacks(
-                object_files, comp_output, callbacks, stdout=stdout, stderr=stderr  # type: ignore
-            )
-        elif len(object_files) == 0:
-            assert len(source_files) > 0, "No source files or object files provided"
-            assert len(source_files) == 1, "Multiple source files provided"
-            source_file = source_files[0]
-            result = controller.run_on_program_with_callbacks(
-                source_file, comp_output, callbacks, stdout=stdout, stderr=stderr  # type: ignore
-            )
-    except Exception as e:
-        stdout.seek(0)
-        stderr.seek(0)
-        Logger.info(stdout.read().decode())
-        Logger.info(stderr.read().decode())
-        raise e
-
-    stdout.seek(0)
-    stderr.seek(0)
-    result = replace(
-        result,
-        stdout_stderr_output=f"{stdout.read().decode('utf-8')}\n{stderr.read().decode('utf-8')}",
-    )
+    stdout = gen_output_file()
+    stderr = gen_output_file()
+
+    # generate a runner
+    run_impl = gen_run_impl(stdout, stderr, files, comp_output, settings)
+    result = run_impl(callbacks)
 
     with open(stats_file, "w") as f:
         for key, value in callbacks.stats.items():
@@ -300,4 +278,4 @@ def run_inlining(
     if log_file is not None:
         result_log(log_file, result.stdout_stderr_output)
 
-    return result  # type: ignore
+    return result
@@ -1,20 +1,12 @@
 from __future__ import annotations
 
 import random
-import shlex
 import subprocess as sp
-import tempfile
 from argparse import ArgumentParser
 from argparse import Namespace as ANS
 from argparse import _SubParsersAction
-from types import SimpleNamespace
 
-from diopter.compiler import (
-    CompilationOutputType,
-    CompilationResult,
-    OptLevel,
-    parse_compilation_setting_from_string,
-)
+from diopter.compiler import CompilationOutputType, CompilationResult
 from pyllinliner.inlinercontroller import (
     CallSite,
     InliningControllerCallBacks,
@@ -26,7 +18,13 @@ from ilclang.utils.decision import DecisionSet
 from ilclang.utils.decision_file import trickle_decision_flip
 from ilclang.utils.logger import Logger
 from ilclang.utils.run_log import callgraph_log, decision_log, erased_log, result_log
-from ilclang.utils.runner import gen_run_impl
+from ilclang.utils.runner import (
+    gen_output_file,
+    gen_run_impl,
+    is_o0_command,
+    parse_compilation_setting_from_argv,
+    run_o0_fallback,
+)
 from ilclang.utils.verbose import VerboseCallBacks
 
 #############
@@ -35,18 +33,18 @@ from ilclang.utils.verbose import VerboseCallBacks
 
 
 class TestInliningCallBacks(InliningControllerCallBacks):
-    call_ids: list[int]
+    call_ids: dict[int, None]
     call_sites: dict[int, CallSite]
     decisions: DecisionSet
-    callgraph: tuple[CallSite, ...]
+    callgraph: list[CallSite]
     was_erased: list[CallSite]
 
     def __init__(self) -> None:
-        self.call_ids = []
+        self.call_ids = {}
         self.call_sites = {}
         self.decisions = DecisionSet()
         self.was_erased = []
-        self.callgraph = ()
+        self.callgraph = []
         self.seed = random.randint(0, 1000000)
         # self.seed = 970056
         print(f"seed: {self.seed}")
@@ -66,20 +64,21 @@ class TestInliningCallBacks(InliningControllerCallBacks):
         return decision
 
     def push(self, id: int, call_site: CallSite) -> None:
-        self.call_ids.append(id)
+        self.call_ids[id] = None
         self.call_sites[id] = call_site
 
     def pop(self, defaultOrderID: int) -> int:
-        self.call_ids = list(
-            sorted(self.call_ids, key=lambda id: self.call_sites[id].caller)
-        )
+        # take the most recently pushed call site with the greatest caller,
+        # the same one a stable sort by caller would leave at the end
+        id = max(reversed(self.call_ids), key=lambda id: self.call_sites[id].caller)
+        del self.call_ids[id]
         # randomly select a call site to pop
         # import random
         # idx = self.rng.randint(0, len(self.call_ids) - 1)
-        return self.call_ids.pop()
+        return id
 
     def erase(self, ID: int) -> None:
-        self.call_ids.remove(ID)
+        del self.call_ids[ID]
         self.was_erased.append(self.call_sites.pop(ID))
 
     def start(self) -> PluginSettings:
@@ -89,7 +88,7 @@ class TestInliningCallBacks(InliningControllerCallBacks):
         )
 
     def end(self, callgraph: tuple[CallSite, ...]) -> None:
-        self.callgraph = self.callgraph + callgraph
+        self.callgraph.extend(callgraph)
 
 
 #######
@@ -125,23 +124,18 @@ def run_inlining(
     final_callgraph_file = args.final_callgraph
     cli_args = args.cli
 
-    # IO
-    stdout = tempfile.NamedTemporaryFile()
-    stderr = tempfile.NamedTemporaryFile()
+    # at O0 we don't use the callbacks
+    if is_o0_command([compiler] + cli_args):
+        return run_o0_fallback([compiler] + cli_args)  # type: ignore
 
     # parse command
-    command = shlex.join([compiler] + cli_args)
-    settings, files, comp_output = parse_compilation_setting_from_string(command)
+    settings, files, comp_output = parse_compilation_setting_from_argv(
+        [compiler] + cli_args
+    )
 
-    # at O0 we don't use the callbacks
-    if settings.opt_level == OptLevel.O0:
-        Logger.warn("Optimization level is O0, will run with clang defaults.")
-        sp.run(command, shell=True, stdout=stdout, stderr=stderr)
-        new_comp_output = SimpleNamespace()
-        new_comp_output.stdout_stderr_output = (
-            f"{stdout.read().decode('utf-8')}\n{stderr.read().decode('utf-8')}"
-        )
-        return new_comp_output  # type: ignore
+    # IO
+    stdout = gen_output_file()
+    stderr = gen_output_file()
 
     # generate a runner
     run_impl = gen_run_impl(stdout, stderr, files, comp_output, settings)
@@ -60,15 +60,12 @@ class DecisionSet:
 
     def clone(self) -> DecisionSet:
         new_decisions = DecisionSet()
-        for d in self.decisions:
-            new_decisions.decisions.append(d.clone())
+        new_decisions.decisions = [d.clone() for d in self.decisions]
         return new_decisions
 
     def clone_only_modified(self) -> DecisionSet:
         new_decisions = DecisionSet()
-        for d in self.decisions:
-            if d.modified:
-                new_decisions.decisions.append(d.clone())
+        new_decisions.decisions = [d.clone() for d in self.decisions if d.modified]
         return new_decisions
 
     def add_decision(
@@ -82,11 +79,13 @@ class DecisionSet:
         call_site: CallSite,
         inlined: bool,
         fixed: bool = False,
-    ) -> None:
+    ) -> Decision:
         # get index of decision to replace
         idx = self.decisions.index(decision)
         assert idx is not None, f"Could not find decision {decision}"
-        self.decisions[idx] = Decision(call_site, inlined, fixed)
+        new_decision = Decision(call_site, inlined, fixed)
+        self.decisions[idx] = new_decision
+        return new_decision
 
     def short_hand(self) -> str:
         return "".join(d.short_hand() for d in self.decisions)
@@ -190,14 +189,8 @@ class DecisionSet:
     @staticmethod
     def from_pyll_tuple(pyll_decisions: tuple[InliningDecision, ...]) -> DecisionSet:
         ds = DecisionSet()
-        for d in pyll_decisions:
-            ds.add_decision(d.callsite, d.inlined)
+        ds.decisions = [Decision(d.callsite, d.inlined, False) for d in pyll_decisions]
         return ds
 
     def __str__(self) -> str:
-        output = ""
-        # output = "{\n"
-        for d in self.decisions:
-            output += f"{d}\n"
-        # output += "}"
-        return output
+        return "".join(f"{d}\n" for d in self.decisions)
@@ -1,53 +1,75 @@
 from __future__ import annotations
 
 import re
+import sys
 from dataclasses import replace
 
 from pyllinliner.inlinercontroller import CallSite
 
 from ilclang.utils.decision import Decision, DecisionSet
 
+# compiled once and anchored at the start of the line, the fields can never
+# contain a quote so [^']* avoids backtracking over the rest of the line
+_CALLSITE_REGEX = re.compile(
+    r"\s*CallSite\(caller='([^']*)', callee='([^']*)', location='([^']*)'\)"
+)
+_DECISION_REGEX = re.compile(
+    r"\s*([\(\[])CallSite\(caller='([^']*)', callee='([^']*)', location='([^']*)'\) : ([TF])[\)\]]"
+)
+
 
 def load_callsite_file(file_path: str) -> list[CallSite]:
     callsites = []
     with open(file_path, "r") as f:
-        regex = r"CallSite\(caller=\'(.*)\', callee=\'(.*)\', location=\'(.*)\'\)"
         for line in f:
             if len(line.strip()) == 0:
                 continue
-            if match := re.search(regex, line):
+            if match := _CALLSITE_REGEX.match(line):
                 caller, callee, location = match.groups()
                 callsites.append(
-                    CallSite(caller=caller, callee=callee, location=location)
+                    CallSite(
+                        caller=sys.intern(caller),
+                        callee=sys.intern(callee),
+                        location=location,
+                    )
                 )
             else:
                 raise Exception(f"Could not parse line: {line}")
     return callsites
 
 
+def parse_decision_line(line: str) -> Decision:
+    # the information from _DECISION_REGEX is stored in the following
+    # variables:
+    # fixed = $1 == "["
+    # caller = $2
+    # callee = $3
+    # location = $4
+    # decision = $5 == "T"
+    if match := _DECISION_REGEX.match(line):
+        fixed, caller, callee, location, decision = match.groups()
+        # function names repeat across many call sites, share one
+        # copy of each rather than one per line
+        return Decision(
+            CallSite(
+                caller=sys.intern(caller),
+                callee=sys.intern(callee),
+                location=location,
+            ),
+            decision == "T",
+            fixed == "[",
+        )
+    raise Exception(f"Could not parse line: {line}")
+
+
 def load_decision_file(file_path: str) -> DecisionSet:
     replay_decisions = DecisionSet()
     with open(file_path, "r") as f:
-        # for each line the information from the regex:
-        # [\(\[]CallSite\(caller=\'(.*)\', callee=\'(.*)\', location=\'(.*)\'\) : ([TF])[\)\]
-        # is stored in the following variables:
-        # caller = $1
-        # callee = $2
-        # location = $3
-        # decision = $4 == "T"
-        regex = r"([\(\[])CallSite\(caller=\'(.*)\', callee=\'(.*)\', location=\'(.*)\'\) : ([TF])[\)\]]"
-        for line in f:
-            if len(line.strip()) == 0:
-                continue
-            if match := re.search(regex, line):
-                fixed, caller, callee, location, decision = match.groups()
-                replay_decisions.add_decision(
-                    CallSite(caller=caller, callee=callee, location=location),
-                    decision == "T",
-                    fixed == "[",
-                )
-            else:
-                raise Exception(f"Could not parse line: {line}")
+        # build the whole list in one pass instead of an add_decision call
+        # per line
+        replay_decisions.decisions = [
+            parse_decision_line(line) for line in f if len(line.strip()) != 0
+        ]
     return replay_decisions
 
 
@@ -68,9 +90,7 @@ def trickle_decision_change(
     # replace the original decision
     og_decision = decisions.decision_for(call_site)
     assert og_decision is not None
-    decisions.replace_decision(og_decision, call_site, inlined, True)
-    updated_decision = decisions.decision_for(call_site)
-    assert updated_decision is not None
+    updated_decision = decisions.replace_decision(og_decision, call_site, inlined, True)
 
     # depending on inlining direction, recursively flip dependant
     # decisions
@@ -1,6 +1,14 @@
 class Logger:
     enable_debug = False
 
+    @staticmethod
+    def _print_colored(color: str, *pos, **args) -> None:  # type: ignore
+        # emit the colour codes and message as one write rather than three
+        sep = args.pop("sep", None)
+        end = args.pop("end", None)
+        message = (" " if sep is None else sep).join(str(p) for p in pos)
+        print(f"{color}{message}\033[0m", end="\n" if end is None else end, **args)
+
     @staticmethod
     def info(*pos, **args) -> None:  # type: ignore
         print(*pos, **args)
@@ -9,25 +17,17 @@ class Logger:
     def debug(*pos, **args) -> None:  # type: ignore
         if Logger.enable_debug:
             # print in blue
-            print("\033[94m", end="")
-            print(*pos, **args)
-            print("\033[0m", end="")
+            Logger._print_colored("\033[94m", *pos, **args)
 
     @staticmethod
     def warn(*pos, **args) -> None:  # type: ignore
-        print("\033[93m", end="")
-        print(*pos, **args)
-        print("\033[0m", end="")
+        Logger._print_colored("\033[93m", *pos, **args)
 
     @staticmethod
     def error(*pos, **args) -> None:  # type: ignore
-        print("\033[91m", end="")
-        print(*pos, **args)
-        print("\033[0m", end="")
+        Logger._print_colored("\033[91m", *pos, **args)
 
     @staticmethod
     def fatal(*pos, **args) -> None:  # type: ignore
-        print("\033[91m", end="")
-        print(*pos, **args)
-        print("\033[0m", end="")
+        Logger._print_colored("\033[91m", *pos, **args)
         exit(1)
@@ -1,3 +1,5 @@
+from typing import Iterable
+
 from pyllinliner.inlinercontroller import CallSite
 
 from ilclang.utils.decision import DecisionSet
@@ -7,21 +9,24 @@ from ilclang.utils.logger import Logger
 def decision_log(decision_file: str, decisions: DecisionSet) -> None:
     Logger.debug("Writing decisions to", decision_file)
     with open(decision_file, "w") as f:
-        f.write(f"{decisions}")
+        # stream one line per decision rather than building the whole file
+        # as a single string first
+        f.writelines(f"{d}\n" for d in decisions.decisions)
 
 
 def erased_log(erased_file: str, was_erased: list[CallSite]) -> None:
     Logger.debug("Writing erased callsites to", erased_file)
     with open(erased_file, "w") as f:
-        for callsite in was_erased:
-            f.write(f"{callsite}\n")
+        f.writelines(f"{callsite}\n" for callsite in was_erased)
 
 
-def callgraph_log(final_callgraph_file: str, callgraph: tuple[CallSite, ...]) -> None:
+def callgraph_log(final_callgraph_file: str, callgraph: Iterable[CallSite]) -> None:
     Logger.debug("Writing final callgraph to", final_callgraph_file)
     with open(final_callgraph_file, "w") as f:
-        for callsite in callgraph:
-            f.write(f"{callsite.caller} -> {callsite.callee} @ {callsite.location}\n")
+        f.writelines(
+            f"{callsite.caller} -> {callsite.callee} @ {callsite.location}\n"
+            for callsite in callgraph
+        )
 
 
 def result_log(log_file: str, result: str) -> None:
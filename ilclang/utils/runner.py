@@ -1,6 +1,10 @@
 from __future__ import annotations
 
+import os
+import subprocess as sp
+import tempfile
 from dataclasses import replace
+from types import SimpleNamespace
 from typing import IO, Callable, Concatenate, ParamSpec
 
 from diopter.compiler import (
@@ -10,6 +14,7 @@ from diopter.compiler import (
     CompilationSetting,
     ObjectCompilationOutput,
     SourceFile,
+    parse_compilation_setting_from_string,
 )
 from pyllinliner.inlinercontroller import InlinerController, InliningControllerCallBacks
 
@@ -26,6 +31,46 @@ BaseFunctionArgs = Concatenate[
 ]
 
 
+def gen_output_file() -> IO[bytes]:
+    # the controller hands this straight to clang, so it needs a real file
+    # descriptor, but on linux it can live in memory instead of on disk
+    if hasattr(os, "memfd_create"):
+        return open(os.memfd_create("ilclang-output"), "w+b")
+    return tempfile.TemporaryFile()
+
+
+def parse_compilation_setting_from_argv(
+    argv: list[str],
+) -> tuple[
+    CompilationSetting, list[SourceFile | ObjectCompilationOutput], CompilationOutput
+]:
+    # diopter splits the command on whitespace itself, so quoting the
+    # arguments with shlex only to have them split again is wasted work
+    return parse_compilation_setting_from_string(" ".join(argv))
+
+
+def is_o0_command(argv: list[str]) -> bool:
+    # mirror how diopter reads the optimization level, the last -O wins and
+    # no -O at all means O0, without paying for a full parse of the command
+    opt = "0"
+    for i, arg in enumerate(argv):
+        if arg == "-O":
+            if i + 1 < len(argv):
+                opt = argv[i + 1]
+        elif arg.startswith("-O"):
+            opt = arg[2:]
+    return opt in ("0", "O0")
+
+
+def run_o0_fallback(argv: list[str]) -> SimpleNamespace:
+    # at O0 the inliner doesn't run, so just hand the command to clang
+    Logger.warn("Optimization level is O0, will run with clang defaults.")
+    proc = sp.run(argv, stdout=sp.PIPE, stderr=sp.STDOUT)
+    new_comp_output = SimpleNamespace()
+    new_comp_output.stdout_stderr_output = proc.stdout.decode("utf-8", errors="replace")
+    return new_comp_output
+
+
 def gen_run_impl_base(
     stdout: IO[bytes],
     stderr: IO[bytes],
@@ -35,10 +80,25 @@ def gen_run_impl_base(
     base_runner: Callable[BaseFunctionArgs, CompilationResult[CompilationOutputType]],
 ) -> Callable[BaseFunctionCustomArgs, CompilationResult[CompilationOutputType],]:
     controller = InlinerController(settings)
-    source_files = tuple(file for file in files if isinstance(file, SourceFile))
-    object_files = tuple(
-        file for file in files if isinstance(file, ObjectCompilationOutput)
-    )
+
+    # split the inputs in a single pass and settle, once, what the
+    # controller will be run on
+    source_files: list[SourceFile] = []
+    object_files: list[ObjectCompilationOutput] = []
+    for file in files:
+        if isinstance(file, SourceFile):
+            source_files.append(file)
+        else:
+            object_files.append(file)
+
+    sources: SourceFile | tuple[ObjectCompilationOutput, ...]
+    if len(source_files) == 0:
+        assert len(object_files) > 0, "No source files or object files provided"
+        sources = tuple(object_files)
+    else:
+        assert len(object_files) == 0, "Mixed source and object files provided"
+        assert len(source_files) == 1, "Multiple source files provided"
+        sources = source_files[0]
 
     def run_impl(
         *args: BaseFunctionCustomArgs.args, **kwargs: BaseFunctionCustomArgs.kwargs
@@ -51,42 +111,30 @@ def gen_run_impl_base(
 
         try:
             # then we run the program
-            if len(source_files) == 0:
-                assert len(object_files) > 0, "No source files or object files provided"
-                result = base_runner(
-                    controller,
-                    object_files,
-                    comp_output,
-                    stdout,
-                    stderr,
-                    *args,
-                    **kwargs,
-                )
-            elif len(object_files) == 0:
-                assert len(source_files) > 0, "No source files or object files provided"
-                assert len(source_files) == 1, "Multiple source files provided"
-                source_file = source_files[0]
-                result = base_runner(
-                    controller,
-                    source_file,
-                    comp_output,
-                    stdout,
-                    stderr,
-                    *args,
-                    **kwargs,
-                )
+            result = base_runner(
+                controller,
+                sources,
+                comp_output,
+                stdout,
+                stderr,
+                *args,
+                **kwargs,
+            )
         except Exception as e:
             stdout.seek(0)
             stderr.seek(0)
-            Logger.info(stdout.read().decode())
-            Logger.info(stderr.read().decode())
+            # a strict decode failing here would hide the original error
+            Logger.info(stdout.read().decode("utf-8", errors="replace"))
+            Logger.info(stderr.read().decode("utf-8", errors="replace"))
             raise e
 
         stdout.seek(0)
         stderr.seek(0)
         result = replace(
             result,
-            stdout_stderr_output=f"{stdout.read().decode('utf-8')}\n{stderr.read().decode('utf-8')}",
+            stdout_stderr_output=b"\n".join((stdout.read(), stderr.read())).decode(
+                "utf-8", errors="replace"
+            ),
         )
 
         return result  # type: ignore
@@ -29,60 +29,69 @@ class VerboseCallBacks(InliningControllerCallBacks):
 
     def advice(self, id: int, default: bool) -> bool:
         advice = self.parent.advice(id, default)
-        call_site = self.memory[id]
-        Logger.debug(
-            f"Advice {call_site.caller} -> {call_site.callee} @ {call_site.location} = {advice} (default: {default})"
-        )
+        if Logger.enable_debug:
+            call_site = self.memory[id]
+            Logger.debug(
+                f"Advice {call_site.caller} -> {call_site.callee} @ {call_site.location} = {advice} (default: {default})"
+            )
         return advice
 
     def push(self, id: int, call_site: CallSite) -> None:
-        Logger.debug(
-            f"Push {call_site.caller} -> {call_site.callee} @ {call_site.location}"
-        )
-        self.memory.update({id: call_site})
+        # memory is only read to format debug messages
+        if Logger.enable_debug:
+            Logger.debug(
+                f"Push {call_site.caller} -> {call_site.callee} @ {call_site.location}"
+            )
+            self.memory[id] = call_site
         self.parent.push(id, call_site)
 
     def pop(self, defaultOrderID: int) -> int:
         id = self.parent.pop(defaultOrderID)
-        call_site = self.memory[id]
-        Logger.debug(
-            f"Pop {call_site.caller} -> {call_site.callee} @ {call_site.location}"
-        )
+        if Logger.enable_debug:
+            call_site = self.memory[id]
+            Logger.debug(
+                f"Pop {call_site.caller} -> {call_site.callee} @ {call_site.location}"
+            )
         return id
 
     def erase(
         self,
         id: int,
     ) -> None:
-        call_site = self.memory[id]
-        Logger.debug(
-            f"Erase {call_site.caller} -> {call_site.callee} @ {call_site.location}"
-        )
+        if Logger.enable_debug:
+            call_site = self.memory[id]
+            Logger.debug(
+                f"Erase {call_site.caller} -> {call_site.callee} @ {call_site.location}"
+            )
         self.parent.erase(id)
 
     def inlined(self, ID: int) -> None:
-        call_site = self.memory[ID]
-        Logger.debug(
-            f"Inlined {call_site.caller} -> {call_site.callee} @ {call_site.location}"
-        )
+        if Logger.enable_debug:
+            call_site = self.memory[ID]
+            Logger.debug(
+                f"Inlined {call_site.caller} -> {call_site.callee} @ {call_site.location}"
+            )
 
     def inlined_with_callee_deleted(self, ID: int) -> None:
-        call_site = self.memory[ID]
-        Logger.debug(
-            f"Inlined with callee deleted {call_site.caller} -> {call_site.callee} @ {call_site.location} (callee deleted)"
-        )
+        if Logger.enable_debug:
+            call_site = self.memory[ID]
+            Logger.debug(
+                f"Inlined with callee deleted {call_site.caller} -> {call_site.callee} @ {call_site.location} (callee deleted)"
+            )
 
     def unsuccessful_inlining(self, ID: int) -> None:
-        call_site = self.memory[ID]
-        Logger.debug(
-            f"Unsuccessful inlining {call_site.caller} -> {call_site.callee} @ {call_site.location}"
-        )
+        if Logger.enable_debug:
+            call_site = self.memory[ID]
+            Logger.debug(
+                f"Unsuccessful inlining {call_site.caller} -> {call_site.callee} @ {call_site.location}"
+            )
 
     def unattempted_inlining(self, ID: int) -> None:
-        call_site = self.memory[ID]
-        Logger.debug(
-            f"Unattempted inlining {call_site.caller} -> {call_site.callee} @ {call_site.location}"
-        )
+        if Logger.enable_debug:
+            call_site = self.memory[ID]
+            Logger.debug(
+                f"Unattempted inlining {call_site.caller} -> {call_site.callee} @ {call_site.location}"
+            )
 
     def start(self) -> PluginSettings:
         Logger.debug("Start")
@@ -95,8 +104,11 @@ class VerboseCallBacks(InliningControllerCallBacks):
 
     def end(self, callgraph: tuple[CallSite, ...]) -> None:
         Logger.debug("End")
-        for call_site in callgraph:
+        if Logger.enable_debug and callgraph:
             Logger.debug(
-                f"Callgraph {call_site.caller} -> {call_site.callee} @ {call_site.location}"
+                "\n".join(
+                    f"Callgraph {call_site.caller} -> {call_site.callee} @ {call_site.location}"
+                    for call_site in callgraph
+                )
             )
         self.parent.end(callgraph)
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 import argparse
 import os
+import re
 import sys
 
 from diopter.compiler import CompilationOutputType, CompilationResult
@@ -17,6 +18,9 @@ from ilclang.controllers import (
 )
 from ilclang.utils.logger import Logger
 
+# whole lines of plugin debug output, dropped in a single pass over the output
+PLUGIN_DEBUG_REGEX = re.compile(r"^.*DEBUG \(PLUGIN\):.*(?:\n|$)", re.MULTILINE)
+
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="ILC Compiler")
@@ -109,15 +113,9 @@ def main() -> None:
 
     stdout = result.stdout_stderr_output
     if not args.verbose and not args.verbose_verbose:
-        new_stdout = []
-        for line in stdout.splitlines():
-            if "DEBUG (PLUGIN):" in line:
-                continue
-            else:
-                new_stdout.append(line)
-        stdout = "\n".join(new_stdout)
-
-    stdout.strip()
+        stdout = PLUGIN_DEBUG_REGEX.sub("", stdout)
+
+    stdout = stdout.strip()
 
     if stdout != "":
         Logger.info(stdout)